@@ -40,6 +40,9 @@ class EventBus:
         # Flag to enable/disable event distribution
         self._enabled = True
         
+        # Handler tasks/futures that have been dispatched but not yet finished
+        self._pending_handlers: Set[asyncio.Future] = set()
+        
         logger.debug("EventBus initialized")
     
     async def subscribe(self, event_type: Type[BaseEvent], handler: Callable) -> None:
@@ -98,36 +101,90 @@ class EventBus:
         logger.debug(f"Emitting event: {event}")
         
         async with self._lock:
-            event_class = event.__class__
-            
-            # Create a list of all handlers that should receive this event
-            handlers_to_notify = []
-            
-            # Check direct subscribers to this event type
-            if event_class in self._subscribers:
-                handlers_to_notify.extend(self._subscribers[event_class])
-            
-            # Check subscribers to parent event types (inheritance)
-            for parent_class in event_class.__mro__[1:]:  # Skip the class itself
-                if parent_class == object:
-                    break
-                if parent_class in self._subscribers:
-                    handlers_to_notify.extend(self._subscribers[parent_class])
+            handlers_to_notify = self._get_handlers(event.__class__)
         
         # Process all handlers outside the lock
         for handler in handlers_to_notify:
-            try:
-                # Check if handler is a coroutine function
-                if asyncio.iscoroutinefunction(handler):
-                    # Create a task to run asynchronously
-                    asyncio.create_task(handler(event))
-                else:
-                    # Run synchronous function in the default executor
-                    loop = asyncio.get_event_loop()
-                    loop.run_in_executor(None, handler, event)
-                    
-            except Exception as e:
-                logger.error(f"Error in event handler for {event}: {e}", exc_info=True)
+            self._dispatch(handler, event)
+    
+    async def emit_many(self, events: List[BaseEvent]) -> None:
+        """
+        Emit a batch of events to all subscribers.
+        
+        Handlers are resolved once per event type under a single lock
+        acquisition, then every event is dispatched in order.
+        
+        Args:
+            events: The events to emit
+        """
+        if not self._enabled:
+            logger.debug(f"Event bus disabled, not emitting {len(events)} events")
+            return
+        
+        logger.debug(f"Emitting {len(events)} events")
+        
+        handlers_by_type: Dict[Type[BaseEvent], List[Callable]] = {}
+        async with self._lock:
+            for event in events:
+                event_class = event.__class__
+                if event_class not in handlers_by_type:
+                    handlers_by_type[event_class] = self._get_handlers(event_class)
+        
+        # Process all handlers outside the lock
+        for event in events:
+            for handler in handlers_by_type[event.__class__]:
+                self._dispatch(handler, event)
+    
+    def _get_handlers(self, event_class: Type[BaseEvent]) -> List[Callable]:
+        """
+        Collect the handlers that should receive events of the given type.
+        
+        Must be called with the lock held.
+        """
+        handlers_to_notify = []
+        
+        # Check direct subscribers to this event type
+        if event_class in self._subscribers:
+            handlers_to_notify.extend(self._subscribers[event_class])
+        
+        # Check subscribers to parent event types (inheritance)
+        for parent_class in event_class.__mro__[1:]:  # Skip the class itself
+            if parent_class == object:
+                break
+            if parent_class in self._subscribers:
+                handlers_to_notify.extend(self._subscribers[parent_class])
+        
+        return handlers_to_notify
+    
+    def _dispatch(self, handler: Callable, event: BaseEvent) -> None:
+        """Schedule a single handler for an event."""
+        try:
+            # Check if handler is a coroutine function
+            if asyncio.iscoroutinefunction(handler):
+                # Create a task to run asynchronously
+                future = asyncio.create_task(handler(event))
+            else:
+                # Run synchronous function in the default executor
+                loop = asyncio.get_event_loop()
+                future = loop.run_in_executor(None, handler, event)
+            
+            # Keep a reference until the handler finishes
+            self._pending_handlers.add(future)
+            future.add_done_callback(self._pending_handlers.discard)
+                
+        except Exception as e:
+            logger.error(f"Error in event handler for {event}: {e}", exc_info=True)
+    
+    async def wait_for_handlers(self) -> None:
+        """
+        Wait until every handler dispatched so far has finished.
+        
+        Handlers scheduled by events emitted from other handlers are waited
+        for as well. Must not be awaited from inside a handler, since the
+        handler would end up waiting for itself.
+        """
+        while self._pending_handlers:
+            await asyncio.gather(*self._pending_handlers, return_exceptions=True)
     
     def enable(self) -> None:
         """Enable event distribution."""
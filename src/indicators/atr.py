@@ -53,6 +53,10 @@ class ATRCalculator:
         # Sort data by timestamp to ensure correct order
         sorted_data = sorted(price_data, key=lambda x: x.timestamp)
         
+        # Only the most recent `period` true ranges are averaged, so skip the
+        # rest of the history (one extra bar supplies the first previous close)
+        sorted_data = sorted_data[-(self.period + 1):]
+        
         # Calculate true ranges
         true_ranges = []
         
@@ -7,7 +7,8 @@ based on historical price data.
 """
 
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
 from src.indicators.atr import ATRCalculator
@@ -23,16 +24,21 @@ class IndicatorManager:
     based on historical price data. It currently supports ATR calculation.
     """
     
-    def __init__(self, minute_data_manager):
+    def __init__(self, minute_data_manager, atr_cache_ttl: float = 0.0):
         """
         Initialize the indicator manager.
         
         Args:
             minute_data_manager: Manager for fetching historical minute data
+            atr_cache_ttl: Seconds a calculated ATR is reused for identical
+                           (symbol, period, days, bar_size) requests; 0 (the
+                           default) disables the cache so every call is fresh
         """
         self.minute_data_manager = minute_data_manager
         self.atr_calculator = ATRCalculator()
         self.indicator_values = {}  # Simple cache for indicator values
+        self.atr_cache_ttl = atr_cache_ttl
+        self._atr_cache: Dict[Tuple[str, int, int, str], Tuple[float, float]] = {}  # key -> (timestamp, atr)
         
     async def get_atr(self, symbol: str, period: int = 14, days: int = 5, bar_size: str = "10 secs") -> Optional[float]:
         """
@@ -47,6 +53,13 @@ class IndicatorManager:
         Returns:
             float: The calculated ATR value, or None if calculation fails
         """
+        # Reuse a recent result for the same parameters instead of refetching bars
+        cache_key = (symbol, period, days, bar_size)
+        cached = self._atr_cache.get(cache_key) if self.atr_cache_ttl > 0 else None
+        if cached and time.monotonic() - cached[0] < self.atr_cache_ttl:
+            logger.debug(f"Using cached ATR for {symbol}: {cached[1]}")
+            return cached[1]
+        
         # Create a calculator with the specified period
         calculator = ATRCalculator(period=period)
         
@@ -70,6 +83,8 @@ class IndicatorManager:
                 self.indicator_values[symbol] = {}
             
             self.indicator_values[symbol]["ATR"] = atr
+            if atr is not None and self.atr_cache_ttl > 0:
+                self._atr_cache[cache_key] = (time.monotonic(), atr)
             
             return atr
             
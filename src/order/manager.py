@@ -8,7 +8,7 @@ submission, and integration with the IBKR Gateway.
 import logging
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Set, Union, Callable, Tuple
+from typing import Dict, List, Optional, Any, Set, Union, Callable, Tuple, Iterable
 
 from src.event.bus import EventBus
 from src.event.order import (
@@ -57,6 +57,9 @@ class OrderManager:
         
         # Symbol tracking
         self._orders_by_symbol: Dict[str, Set[str]] = {}  # symbol -> set(order_ids)
+        self._orders_by_kind: Dict[str, Dict[Tuple[OrderType, OrderSide], List[str]]] = {}  # symbol -> (type, side) -> order_ids
+        self._registration_seq: Dict[str, int] = {}  # order_id -> registration sequence number
+        self._next_registration_seq = 0
         
         logger.debug("OrderManager initialized")
     
@@ -542,8 +545,16 @@ class OrderManager:
             # Cancel all active orders
             order_ids = list(self._active_orders)
         
-        for order_id in order_ids:
-            if await self.cancel_order(order_id, reason or "Cancel all orders"):
+        # Send the cancellations concurrently rather than one at a time
+        results = await asyncio.gather(
+            *(self.cancel_order(order_id, reason or "Cancel all orders") for order_id in order_ids),
+            return_exceptions=True
+        )
+        
+        for order_id, result in zip(order_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error cancelling order {order_id}: {result}")
+            elif result:
                 cancelled += 1
         
         return cancelled
@@ -689,6 +700,46 @@ class OrderManager:
         order_ids = self._orders_by_symbol.get(symbol, set())
         return [self._orders[order_id] for order_id in order_ids if order_id in self._orders]
     
+    async def get_orders(self,
+                        symbol: str,
+                        order_type: Optional[OrderType] = None,
+                        side: Optional[OrderSide] = None,
+                        status_in: Optional[Iterable[OrderStatus]] = None) -> List[Order]:
+        """
+        Get the orders for a symbol, filtered by type, side and status.
+        
+        Type and side lookups use a per-symbol index, so only matching
+        orders are visited.
+        
+        Args:
+            symbol: The symbol to get orders for
+            order_type: Optional order type to filter by
+            side: Optional order side to filter by
+            status_in: Optional statuses the orders must have
+            
+        Returns:
+            List[Order]: Matching orders, in creation order
+        """
+        by_kind = self._orders_by_kind.get(symbol, {})
+        order_ids = [
+            order_id
+            for (kind_type, kind_side), ids in by_kind.items()
+            if (order_type is None or kind_type == order_type) and (side is None or kind_side == side)
+            for order_id in ids
+        ]
+        orders = [self._orders[order_id] for order_id in order_ids if order_id in self._orders]
+        
+        if status_in is not None:
+            statuses = frozenset(status_in)
+            orders = [order for order in orders if order.status in statuses]
+        
+        if order_type is None or side is None:
+            # Merge the buckets back into creation order
+            registration_seq = self._registration_seq
+            orders.sort(key=lambda o: registration_seq[o.order_id])
+        
+        return orders
+    
     async def get_active_orders(self, symbol: Optional[str] = None) -> List[Order]:
         """
         Get all active orders, optionally filtered by symbol.
@@ -768,11 +819,20 @@ class OrderManager:
         # Add to orders map
         self._orders[order.order_id] = order
         
+        # Record the registration order, which breaks create_time ties
+        if order.order_id not in self._registration_seq:
+            self._registration_seq[order.order_id] = self._next_registration_seq
+            self._next_registration_seq += 1
+        
         # Add to symbol map
         if order.symbol not in self._orders_by_symbol:
             self._orders_by_symbol[order.symbol] = set()
         self._orders_by_symbol[order.symbol].add(order.order_id)
         
+        # Add to symbol/type/side index
+        kinds = self._orders_by_kind.setdefault(order.symbol, {})
+        kinds.setdefault((order.order_type, order.side), []).append(order.order_id)
+        
         # Add to status map
         if order.is_active:
             self._active_orders.add(order.order_id)
@@ -10,7 +10,7 @@ import threading
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, Set, Optional, List, Tuple
+from typing import Any, Dict, Set, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +117,19 @@ class PositionManager:
             self._initialized = True
             logger.info("PositionManager initialized")
     
+    @classmethod
+    def create_isolated(cls) -> "PositionManager":
+        """
+        Create a standalone PositionManager that bypasses the singleton.
+        
+        Intended for tests that inject their own instance through
+        context["position_manager"] instead of sharing global state.
+        """
+        instance = object.__new__(cls)
+        instance._initialized = False
+        instance.__init__()
+        return instance
+    
     def open_position(self, symbol: str, side: str) -> Position:
         """
         Open a new position.
@@ -316,4 +329,22 @@ class PositionManager:
                 "total_positions": len(self._positions),
                 "total_orders_tracked": total_orders,
                 "order_mappings": len(self._order_to_position)
-            } 
\ No newline at end of file
+            }
+
+
+def get_position_manager(context: Optional[Dict[str, Any]] = None) -> PositionManager:
+    """
+    Get the PositionManager for a rule context.
+    
+    Args:
+        context: Rule engine context; its "position_manager" entry (e.g. an
+            isolated instance in tests) is used when set
+    
+    Returns:
+        PositionManager: The context's instance, or the global singleton
+    """
+    if context:
+        position_manager = context.get("position_manager")
+        if position_manager is not None:
+            return position_manager
+    return PositionManager()
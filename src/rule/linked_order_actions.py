@@ -18,7 +18,7 @@ from datetime import datetime
 from src.event.bus import EventBus
 from src.order.manager import OrderManager
 from src.position.tracker import PositionTracker
-from src.position.position_manager import PositionManager
+from src.position.position_manager import get_position_manager
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +53,7 @@ class CooldownResetManager:
             order_id = event.order_id
             
             # Use PositionManager to check if it's a stop order
-            position_manager = PositionManager()
+            position_manager = get_position_manager(self.rule_engine.context)
             position = position_manager.find_position_by_order(order_id)
             
             if position and order_id in position.stop_orders:
@@ -134,8 +134,8 @@ class LinkedCreateOrderAction(Action):
         # Get the trade tracker singleton
         trade_tracker = TradeTracker()
         
-        # Get the position manager singleton (for dual-write)
-        position_manager = PositionManager()
+        # Get the position manager (for dual-write)
+        position_manager = get_position_manager(context)
         
         # FIRST: Check if we already have an active trade for this symbol
         active_trade = trade_tracker.get_active_trade(self.symbol)
@@ -272,7 +272,7 @@ class LinkedCreateOrderAction(Action):
         """Exit current position by canceling all orders and closing position."""
         try:
             order_manager = context.get("order_manager")
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
 
             # 1️⃣ Flatten live position at market if any quantity remains
             pm_position = position_manager.get_position(self.symbol)
@@ -310,7 +310,7 @@ class LinkedCreateOrderAction(Action):
     async def _create_protective_orders(self, context: Dict[str, Any], main_order, actual_shares):
         """Create stop loss and take profit orders."""
         order_manager = context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = get_position_manager(context)
         
         # Get current price for calculations
         current_price = self.limit_price or context.get("prices", {}).get(self.symbol)
@@ -426,7 +426,7 @@ class LinkedCreateOrderAction(Action):
             await asyncio.sleep(0.5)
             
             # Get position manager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             
             # Check if stop orders exist now
             stop_orders = position_manager.get_linked_orders(self.symbol, "stop")
@@ -478,7 +478,7 @@ class LinkedScaleInAction(Action):
         
         try:
             # Get position manager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             
             # Find the side of existing position
             side = await position_manager.find_active_position_side(self.symbol)
@@ -530,7 +530,7 @@ class LinkedScaleInAction(Action):
     async def _update_protective_orders(self, context: Dict[str, Any], position, scale_order, side: str):
         """Update stop loss and take profit orders after scale-in."""
         order_manager = context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = get_position_manager(context)
         
         # Calculate new average price
         current_value = position.quantity * position.entry_price
@@ -669,7 +669,7 @@ class LinkedCloseAllAction(Action):
         
         try:
             # Get position manager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             
             # Get all linked orders from PositionManager
             all_orders = position_manager.get_linked_orders(self.symbol)
@@ -734,7 +734,7 @@ class LinkedDoubleDownAction(Action):
         
         try:
             # Get position manager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             
             # Check if we have an active position for this symbol
             if not position_manager.has_active_position(self.symbol):
@@ -791,7 +791,7 @@ class LinkedDoubleDownAction(Action):
         """Calculate the price and quantity for the double down order."""
         try:
             # Get position manager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             position = position_manager.get_position(self.symbol)
             if not position:
                 logger.error(f"No position found for {self.symbol}")
@@ -882,7 +882,7 @@ class LinkedDoubleDownAction(Action):
         """Calculate the distance from current price to stop loss."""
         try:
             # Get position from PositionManager
-            position_manager = PositionManager()
+            position_manager = get_position_manager(context)
             position = position_manager.get_position(self.symbol)
             
             if position and position.atr_stop_multiplier is not None:
@@ -920,7 +920,7 @@ class LinkedFlattenCloseAction(Action):
 
     async def execute(self, context: Dict[str, Any]) -> bool:
         order_manager = context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = get_position_manager(context)
         position_tracker = context.get("position_tracker")
         app = context.get("application")
         if not order_manager or not position_manager or not app:
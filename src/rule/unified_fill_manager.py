@@ -21,7 +21,7 @@ from dataclasses import dataclass
 from enum import Enum
 
 from src.event.order import FillEvent
-from src.position.position_manager import PositionManager
+from src.position.position_manager import PositionManager, get_position_manager
 from src.trade_tracker import TradeTracker
 from src.order.base import OrderType, OrderStatus
 
@@ -55,11 +55,34 @@ class UnifiedFillManager:
     while allowing concurrent processing across different symbols.
     """
     
-    def __init__(self, context: Dict[str, Any], event_bus):
+    def __init__(self, context: Dict[str, Any], event_bus,
+                 max_retries: int = 3, retry_delay: float = 0.5,
+                 cancel_settle_delay: float = 0.1):
+        """
+        Initialize the manager.
+        
+        Args:
+            context: Shared rule engine context (order_manager, position_tracker, ...)
+            event_bus: Event bus to subscribe to fill events on
+            max_retries: Attempts per protective order replacement
+            retry_delay: Seconds to wait between replacement attempts
+            cancel_settle_delay: Seconds to wait after a cancel before re-creating the order
+        
+        Raises:
+            ValueError: If max_retries is less than 1
+        """
+        if max_retries < 1:
+            raise ValueError(f"max_retries must be at least 1, got {max_retries}")
+        
         self.context = context
         self.event_bus = event_bus
         self.logger = logging.getLogger(self.__class__.__name__)
         
+        # Retry timing for order replacement
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.cancel_settle_delay = cancel_settle_delay
+        
         # Per-symbol locks to serialize fill processing
         self._symbol_locks: Dict[str, asyncio.Lock] = {}
         
@@ -77,6 +100,10 @@ class UnifiedFillManager:
         await self.event_bus.subscribe(FillEvent, self.on_order_fill)
         self.logger.info("UnifiedFillManager initialized with concurrency control")
     
+    def _get_position_manager(self) -> PositionManager:
+        """Get the PositionManager from context, falling back to the global singleton."""
+        return get_position_manager(self.context)
+    
     async def _get_symbol_lock(self, symbol: str) -> asyncio.Lock:
         """Get or create a lock for the given symbol."""
         async with self._locks_lock:
@@ -105,7 +132,11 @@ class UnifiedFillManager:
             try:
                 # Wait for an operation
                 operation = await queue.get()
-                
+            except asyncio.CancelledError:
+                self.logger.info(f"Order queue processor for {symbol} cancelled")
+                break
+            
+            try:
                 self.logger.info(f"Processing operation for {symbol}: {operation.operation_type.value}")
                 
                 # Process the operation
@@ -122,8 +153,6 @@ class UnifiedFillManager:
                 elif operation.operation_type == OrderOperationType.CANCEL_ALL:
                     await self._execute_cancel_all_orders(symbol, operation.reason)
                 
-                # Mark the operation as done
-                queue.task_done()
                 self.logger.info(f"Completed operation for {symbol}: {operation.operation_type.value}")
                 
             except asyncio.CancelledError:
@@ -131,6 +160,24 @@ class UnifiedFillManager:
                 break
             except Exception as e:
                 self.logger.error(f"Error processing order queue for {symbol}: {e}", exc_info=True)
+            finally:
+                # Always mark the operation as done so queue.join() cannot hang
+                queue.task_done()
+    
+    async def wait_for_queued_operations(self, symbol: Optional[str] = None):
+        """
+        Wait until all queued order operations have been processed.
+        
+        Args:
+            symbol: Only wait for this symbol's queue; waits for all queues if None
+        """
+        if symbol is not None:
+            queues = [self._order_queues[symbol]] if symbol in self._order_queues else []
+        else:
+            queues = list(self._order_queues.values())
+        
+        for queue in queues:
+            await queue.join()
     
     async def on_order_fill(self, event: FillEvent):
         """
@@ -162,7 +209,7 @@ class UnifiedFillManager:
             self.logger.info(f"Processing fill for {symbol}: {fill_quantity} shares on order {order_id}")
             
             # Get PositionManager to track order relationships
-            position_manager = PositionManager()
+            position_manager = self._get_position_manager()
             pm_position = position_manager.get_position(symbol)
             
             if not pm_position:
@@ -234,7 +281,7 @@ class UnifiedFillManager:
         Other orders may be partially filled.
         """
         order_manager = self.context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = self._get_position_manager()
         pm_position = position_manager.get_position(symbol)
         
         if not pm_position:
@@ -416,10 +463,10 @@ class UnifiedFillManager:
         This method is called by the queue processor to ensure serialization.
         """
         order_manager = self.context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = self._get_position_manager()
         
-        max_retries = 3
-        retry_delay = 0.5  # seconds
+        max_retries = self.max_retries
+        retry_delay = self.retry_delay
         
         for attempt in range(max_retries):
             try:
@@ -441,7 +488,8 @@ class UnifiedFillManager:
                 position_manager.remove_order(symbol, old_order_id)
                 
                 # Small delay to ensure cancellation is processed
-                await asyncio.sleep(0.1)
+                if self.cancel_settle_delay:
+                    await asyncio.sleep(self.cancel_settle_delay)
                 
                 # Create new order with updated quantity
                 if order_type == "stop":
@@ -511,7 +559,7 @@ class UnifiedFillManager:
         await queue.put(operation)
         
         # Update position status immediately
-        position_manager = PositionManager()
+        position_manager = self._get_position_manager()
         position_manager.close_position(symbol)
         
         # Update PositionTracker
@@ -533,7 +581,7 @@ class UnifiedFillManager:
         This method is called by the queue processor to ensure serialization.
         """
         order_manager = self.context.get("order_manager")
-        position_manager = PositionManager()
+        position_manager = self._get_position_manager()
         pm_position = position_manager.get_position(symbol)
         
         if not pm_position:
@@ -2,15 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
-import os
-import sys
 import pytest
 import logging
 from unittest.mock import patch
 
-# Add the parent directory to the system path to import the modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 # Import mocks
 from tests.mocks import MockIBKRAPI, MockConfig, MockErrorHandler, AsyncMock
 
@@ -7,12 +7,7 @@ the event bus and event classes.
 
 import asyncio
 import pytest
-import sys
 from datetime import datetime
-from pathlib import Path
-
-# Add the project root to sys.path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.event.base import BaseEvent
 from src.event.bus import EventBus
@@ -75,8 +70,8 @@ class TestEventBus:
         event = BaseEvent()
         await event_bus.emit(event)
         
-        # Give the event loop a chance to process
-        await asyncio.sleep(0.1)
+        # Wait for the dispatched handlers to finish
+        await event_bus.wait_for_handlers()
         
         assert len(events_received) == 1
         assert events_received[0].event_id == event.event_id
@@ -106,8 +101,8 @@ class TestEventBus:
         event = PriceEvent(symbol="AAPL", price=150.0)
         await event_bus.emit(event)
         
-        # Give the event loop a chance to process
-        await asyncio.sleep(0.1)
+        # Wait for the dispatched handlers to finish
+        await event_bus.wait_for_handlers()
         
         # The event should be received by all three handlers
         assert len(base_events) == 1
@@ -132,12 +127,67 @@ class TestEventBus:
         event = BaseEvent()
         await event_bus.emit(event)
         
-        # Give the event loop a chance to process
-        await asyncio.sleep(0.1)
+        # Wait for the dispatched handlers to finish
+        await event_bus.wait_for_handlers()
         
         # The event should not be received
         assert len(events_received) == 0
     
+    @pytest.mark.asyncio
+    async def test_emit_many(self, event_bus):
+        """Test emitting a batch of events."""
+        base_events = []
+        price_events = []
+        
+        async def base_handler(event):
+            base_events.append(event)
+        
+        async def price_handler(event):
+            price_events.append(event)
+        
+        await event_bus.subscribe(BaseEvent, base_handler)
+        await event_bus.subscribe(PriceEvent, price_handler)
+        
+        # Emit a mixed batch of events
+        events = [
+            PriceEvent(symbol="AAPL", price=150.0),
+            BaseEvent(),
+            PriceEvent(symbol="MSFT", price=300.0),
+        ]
+        await event_bus.emit_many(events)
+        
+        # Wait for the dispatched handlers to finish
+        await event_bus.wait_for_handlers()
+        
+        # Every event reaches the base handler, only price events the price handler
+        assert [e.event_id for e in base_events] == [e.event_id for e in events]
+        assert [e.symbol for e in price_events] == ["AAPL", "MSFT"]
+    
+    @pytest.mark.asyncio
+    async def test_wait_for_handlers(self, event_bus):
+        """Test waiting for slow and chained handlers to finish."""
+        price_events = []
+        
+        async def base_handler(event):
+            await asyncio.sleep(0.01)
+            # Chain a follow-up price event from inside a handler
+            if type(event) is BaseEvent:
+                await event_bus.emit(PriceEvent(symbol="AAPL", price=150.0))
+        
+        async def price_handler(event):
+            await asyncio.sleep(0.01)
+            price_events.append(event)
+        
+        await event_bus.subscribe(BaseEvent, base_handler)
+        await event_bus.subscribe(PriceEvent, price_handler)
+        
+        await event_bus.emit(BaseEvent())
+        await event_bus.wait_for_handlers()
+        
+        # The chained price event has been fully handled
+        assert len(price_events) == 1
+        assert price_events[0].symbol == "AAPL"
+    
     @pytest.mark.asyncio
     async def test_get_subscriber_count(self, event_bus):
         """Test getting subscriber counts."""
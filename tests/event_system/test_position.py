@@ -7,16 +7,12 @@ position classes and the position tracker.
 
 import asyncio
 import pytest
-import sys
 from datetime import datetime
-from pathlib import Path
-
-# Add the project root to sys.path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.event.bus import EventBus
 from src.event.position import PositionStatus, PositionOpenEvent, PositionUpdateEvent, PositionCloseEvent
 from src.position.base import Position
+from src.position.position_manager import PositionManager
 from src.position.stock import StockPosition
 from src.position.tracker import PositionTracker
 
@@ -357,4 +353,22 @@ class TestPositionTracker:
         
         # Check has_open_positions again
         assert await position_tracker.has_open_positions() is True
-        assert await position_tracker.has_open_positions("AAPL") is False
\ No newline at end of file
+        assert await position_tracker.has_open_positions("AAPL") is False
+
+
+class TestPositionManager:
+    """Tests for the PositionManager class."""
+    
+    def test_create_isolated(self):
+        """Test that isolated instances do not share state with the singleton."""
+        isolated = PositionManager.create_isolated()
+        
+        assert isolated is not PositionManager()
+        assert isolated is not PositionManager.create_isolated()
+        
+        isolated.open_position("ISOL", "BUY")
+        isolated.add_orders_to_position("ISOL", "main", ["main_1"])
+        
+        assert isolated.get_position("ISOL").main_orders == {"main_1"}
+        assert isolated.find_position_by_order("main_1").symbol == "ISOL"
+        assert PositionManager().get_position("ISOL") is None
@@ -7,12 +7,7 @@ order classes and the order manager.
 
 import asyncio
 import pytest
-import sys
 from datetime import datetime
-from pathlib import Path
-
-# Add the project root to sys.path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.event.bus import EventBus
 from src.order.base import Order, OrderStatus, OrderType, TimeInForce, OrderSide
@@ -336,6 +331,37 @@ class TestOrderManager:
         assert len(completed_orders) == 1
         assert completed_orders[0].order_id == order.order_id
     
+    @pytest.mark.asyncio
+    async def test_get_orders_filtered(self, order_manager):
+        """Test filtered order lookup by type, side and status."""
+        entry = await order_manager.create_order(
+            symbol="AAPL", quantity=100, order_type=OrderType.MARKET
+        )
+        stop = await order_manager.create_order(
+            symbol="AAPL", quantity=-100, order_type=OrderType.STOP, stop_price=145.0, auto_submit=True
+        )
+        target = await order_manager.create_order(
+            symbol="AAPL", quantity=-100, order_type=OrderType.LIMIT, limit_price=160.0
+        )
+        await order_manager.create_order(symbol="MSFT", quantity=100, order_type=OrderType.MARKET)
+        
+        assert await order_manager.get_orders("AAPL") == [entry, stop, target]
+        assert await order_manager.get_orders("AAPL", OrderType.STOP) == [stop]
+        assert await order_manager.get_orders("AAPL", side=OrderSide.SELL) == [stop, target]
+        assert await order_manager.get_orders("AAPL", OrderType.LIMIT, OrderSide.BUY) == []
+        assert await order_manager.get_orders(
+            "AAPL", side=OrderSide.SELL, status_in=[OrderStatus.ACCEPTED]
+        ) == [stop]
+        assert await order_manager.get_orders("TSLA") == []
+        
+        # Orders created within one clock tick keep their creation order
+        entry2 = await order_manager.create_order(
+            symbol="AAPL", quantity=100, order_type=OrderType.MARKET
+        )
+        for order in (entry, stop, target, entry2):
+            order.create_time = entry.create_time
+        assert await order_manager.get_orders("AAPL") == [entry, stop, target, entry2]
+    
     @pytest.mark.asyncio
     async def test_bracket_order_creation(self, order_manager):
         """Test bracket order creation through manager."""
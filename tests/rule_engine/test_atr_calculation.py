@@ -10,6 +10,7 @@ from typing import List, Dict
 
 # Import the ATR calculator that doesn't exist yet
 from src.indicators.atr import ATRCalculator
+from src.indicators.manager import IndicatorManager
 from src.minute_data.models import MinuteBar
 
 
@@ -194,4 +195,39 @@ async def test_atr_verification():
     atr = await calculator.calculate(known_data)
     
     # Check against expected value with small tolerance for floating point
-    assert abs(atr - expected_atr_5) < 0.001
\ No newline at end of file
+    assert abs(atr - expected_atr_5) < 0.001
+
+
+@pytest.mark.asyncio
+async def test_indicator_manager_caches_atr(sample_price_data):
+    """Test that repeated ATR requests reuse the cached value."""
+    class FakeMinuteDataManager:
+        def __init__(self):
+            self.calls = 0
+        
+        async def get_historical_data(self, symbol, days, bar_size):
+            self.calls += 1
+            return sample_price_data
+    
+    # The cache is disabled by default
+    data_manager = FakeMinuteDataManager()
+    indicator_manager = IndicatorManager(minute_data_manager=data_manager)
+    await indicator_manager.get_atr("AAPL", period=14, days=5, bar_size="10 secs")
+    await indicator_manager.get_atr("AAPL", period=14, days=5, bar_size="10 secs")
+    assert data_manager.calls == 2
+    
+    data_manager = FakeMinuteDataManager()
+    indicator_manager = IndicatorManager(minute_data_manager=data_manager, atr_cache_ttl=60.0)
+    
+    atr = await indicator_manager.get_atr("AAPL", period=14, days=5, bar_size="10 secs")
+    assert await indicator_manager.get_atr("AAPL", period=14, days=5, bar_size="10 secs") == atr
+    assert data_manager.calls == 1
+    
+    # Different parameters are fetched separately
+    await indicator_manager.get_atr("AAPL", period=5, days=5, bar_size="10 secs")
+    assert data_manager.calls == 2
+    
+    # A zero TTL disables the cache
+    indicator_manager.atr_cache_ttl = 0
+    await indicator_manager.get_atr("AAPL", period=14, days=5, bar_size="10 secs")
+    assert data_manager.calls == 3
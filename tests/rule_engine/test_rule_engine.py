@@ -4,14 +4,9 @@ Tests for the rule engine components including conditions, actions, and rule eva
 
 import asyncio
 import pytest
-import sys
 from datetime import datetime, time, timedelta
-from pathlib import Path
 from unittest.mock import MagicMock, AsyncMock
 
-# Add the project root to sys.path
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
 from src.event.base import BaseEvent
 from src.event.bus import EventBus
 from src.event.market import MarketEvent, PriceEvent
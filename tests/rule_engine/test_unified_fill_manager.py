@@ -0,0 +1,150 @@
+"""
+Unit tests for the UnifiedFillManager.
+"""
+
+import asyncio
+
+import pytest
+
+from src.event.bus import EventBus
+from src.event.order import FillEvent, OrderStatus
+from src.position.position_manager import PositionManager, PositionStatus, get_position_manager
+from src.rule.linked_order_actions import LinkedCloseAllAction
+from src.rule.unified_fill_manager import OrderOperation, OrderOperationType, UnifiedFillManager
+
+
+class FakeOrder:
+    """Minimal order returned by the fake order manager."""
+
+    def __init__(self, order_id: str):
+        self.order_id = order_id
+        self.is_active = False
+
+
+class FakeOrderManager:
+    """Order manager stub that records cancellations."""
+
+    def __init__(self):
+        self.cancelled = []
+
+    async def get_order(self, order_id):
+        return FakeOrder(order_id)
+
+    async def cancel_order(self, order_id, reason=None):
+        self.cancelled.append(order_id)
+        return True
+
+
+class FakePositionTracker:
+    """Position tracker stub without any open positions."""
+
+    async def get_positions_for_symbol(self, symbol):
+        return []
+
+
+@pytest.mark.asyncio
+async def test_isolated_position_manager_leaves_singleton_untouched():
+    """Test that an injected PositionManager is used by the fill manager and the actions."""
+    isolated = PositionManager.create_isolated()
+    singleton = PositionManager()
+    assert isolated is not singleton
+
+    context = {
+        "order_manager": FakeOrderManager(),
+        "position_tracker": FakePositionTracker(),
+        "position_manager": isolated,
+    }
+    assert get_position_manager(context) is isolated
+
+    # A full stop fill closes the position in the injected manager
+    isolated.open_position("ISOLATED", "BUY")
+    isolated.add_orders_to_position("ISOLATED", "stop", ["isolated-stop"])
+
+    fill_manager = UnifiedFillManager(context, EventBus())
+    await fill_manager.on_order_fill(FillEvent(
+        order_id="isolated-stop",
+        symbol="ISOLATED",
+        status=OrderStatus.FILLED,
+        fill_price=95.0,
+        fill_quantity=-100
+    ))
+    await fill_manager.wait_for_queued_operations("ISOLATED")
+    await fill_manager.cleanup()
+
+    assert isolated.get_position("ISOLATED").status is PositionStatus.CLOSED
+
+    # The linked actions resolve the same instance from the context
+    isolated.open_position("ISOLATED2", "BUY")
+    isolated.add_orders_to_position("ISOLATED2", "target", ["isolated-target"])
+    assert await LinkedCloseAllAction("ISOLATED2").execute(context)
+
+    assert isolated.get_position("ISOLATED2").status is PositionStatus.CLOSED
+    assert context["order_manager"].cancelled == ["isolated-target"]
+
+    # The global singleton never saw either position
+    assert singleton.get_position("ISOLATED") is None
+    assert singleton.get_position("ISOLATED2") is None
+
+
+@pytest.mark.asyncio
+async def test_wait_for_queued_operations_after_failed_operation():
+    """Test that a failing queued operation does not block waiting for the queue."""
+    fill_manager = UnifiedFillManager({"order_manager": FakeOrderManager()}, EventBus())
+    executed = []
+
+    async def failing_replace(*args):
+        executed.append("replace")
+        raise RuntimeError("replace failed")
+
+    async def cancel_all(symbol, reason):
+        executed.append("cancel_all")
+
+    fill_manager._execute_replace_order = failing_replace
+    fill_manager._execute_cancel_all_orders = cancel_all
+
+    queue = await fill_manager._get_order_queue("QUEUED")
+    await queue.put(OrderOperation(OrderOperationType.REPLACE_STOP, "QUEUED",
+                                   old_order_id="stop-1", new_quantity=-100, price=95.0))
+    await queue.put(OrderOperation(OrderOperationType.CANCEL_ALL, "QUEUED", reason="test"))
+
+    await asyncio.wait_for(fill_manager.wait_for_queued_operations(), 1)
+    await fill_manager.cleanup()
+
+    assert executed == ["replace", "cancel_all"]
+
+
+@pytest.mark.asyncio
+async def test_replace_order_retries_failed_creation():
+    """Test that a protective order replacement is retried until creation succeeds."""
+    class FlakyOrderManager(FakeOrderManager):
+        def __init__(self):
+            super().__init__()
+            self.create_attempts = 0
+
+        async def create_order(self, **kwargs):
+            self.create_attempts += 1
+            if self.create_attempts < 3:
+                return None
+            return FakeOrder("new-stop")
+
+    order_manager = FlakyOrderManager()
+    position_manager = PositionManager.create_isolated()
+    position_manager.open_position("RETRY", "BUY")
+    position_manager.add_orders_to_position("RETRY", "stop", ["old-stop"])
+
+    fill_manager = UnifiedFillManager(
+        {"order_manager": order_manager, "position_manager": position_manager},
+        EventBus(),
+        retry_delay=0,
+        cancel_settle_delay=0
+    )
+    await fill_manager._execute_replace_order("RETRY", "old-stop", -200, "stop", 95.0)
+
+    assert order_manager.create_attempts == 3
+    assert position_manager.get_position("RETRY").stop_orders == {"new-stop"}
+
+
+def test_max_retries_must_be_positive():
+    """Test that a fill manager without any replacement attempts is rejected."""
+    with pytest.raises(ValueError):
+        UnifiedFillManager({}, EventBus(), max_retries=0)
@@ -0,0 +1,262 @@
+"""
+Shared setup and order helpers for the double down TWS tests.
+
+Provides a harness owning the TWS connection and managers used by the
+double down tests, a live event-driven view of a symbol's orders and helpers for categorizing them.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.tws_connection import TWSConnection
+from src.tws_config import TWSConfig
+from src.event.bus import EventBus
+from src.event.order import OrderEvent, NewOrderEvent
+from src.order.manager import OrderManager
+from src.order.base import Order, OrderSide, OrderStatus, OrderType
+from src.position.position_manager import get_position_manager
+from src.position.tracker import PositionTracker
+from src.rule.engine import RuleEngine
+from src.rule.unified_fill_manager import UnifiedFillManager
+from src.indicators.manager import IndicatorManager
+from src.trade_tracker import TradeTracker
+
+logger = logging.getLogger(__name__)
+
+# Statuses of orders that are live at the broker
+ACTIVE_STATUSES = frozenset({OrderStatus.SUBMITTED, OrderStatus.ACCEPTED})
+
+
+class TestHarness:
+    """
+    TWS connection and managers shared by the double down test scenarios.
+    
+    Connects and initializes everything once on entry, so scenarios run
+    inside one ``async with TestHarness() as harness:`` block reuse the same
+    connection instead of repeating the TWS handshake and manager startup.
+    Stops the rule engine and disconnects from TWS on exit.
+    """
+    
+    __test__ = False  # Not a pytest test class
+    
+    def __init__(self, client_id_env: str = "TWS_CLIENT_ID"):
+        """
+        Initialize the harness.
+        
+        Args:
+            client_id_env: Environment variable holding the TWS client ID
+        """
+        self.client_id_env = client_id_env
+        self.tws: Optional[TWSConnection] = None
+        self.event_bus: Optional[EventBus] = None
+        self.order_manager: Optional[OrderManager] = None
+        self.position_tracker: Optional[PositionTracker] = None
+        self.rule_engine: Optional[RuleEngine] = None
+        self.indicator_manager: Optional[IndicatorManager] = None
+        self.fill_manager: Optional[UnifiedFillManager] = None
+    
+    async def __aenter__(self) -> "TestHarness":
+        # Create event bus
+        self.event_bus = EventBus()
+        
+        # Create TWS connection
+        config = TWSConfig(
+            host="127.0.0.1",
+            port=7497,
+            client_id=int(os.getenv(self.client_id_env, "10"))
+        )
+        
+        self.tws = TWSConnection(config)
+        
+        # Connect to TWS
+        logger.info("Connecting to TWS...")
+        connected = await self.tws.connect()
+        if not connected:
+            logger.error("Failed to connect to TWS")
+            raise ConnectionError("Failed to connect to TWS")
+        
+        logger.info("✅ Connected to TWS")
+        
+        # Create managers
+        self.order_manager = OrderManager(self.event_bus, self.tws)
+        await self.order_manager.initialize()
+        
+        self.position_tracker = PositionTracker(self.event_bus)
+        await self.position_tracker.initialize()
+        
+        # Create rule engine with context; scenarios add their symbol's price
+        self.rule_engine = RuleEngine(self.event_bus)
+        self.rule_engine.context.update({
+            "order_manager": self.order_manager,
+            "position_tracker": self.position_tracker,
+            "prices": {}
+        })
+        
+        # Add indicator manager for ATR calculation; scenarios run back to back
+        # reuse an ATR fetched within the last minute
+        self.indicator_manager = IndicatorManager(
+            minute_data_manager=self.tws.minute_bar_manager,
+            atr_cache_ttl=60.0
+        )
+        self.rule_engine.context["indicator_manager"] = self.indicator_manager
+        
+        # UnifiedFillManager handles all fills and protective order updates
+        self.fill_manager = UnifiedFillManager(self.rule_engine.context, self.event_bus)
+        await self.fill_manager.initialize()
+        
+        # Start rule engine
+        await self.rule_engine.start()
+        
+        return self
+    
+    def reset_symbol(self, symbol: str):
+        """
+        Clear the trade state a scenario left behind for a symbol.
+        
+        LinkedCreateOrderAction ignores a signal while the TradeTracker or
+        PositionManager still has an active trade for the symbol, so each
+        scenario resets them before the next one runs on the same harness.
+        
+        Args:
+            symbol: The symbol the scenario traded
+        """
+        TradeTracker().close_trade(symbol)
+        get_position_manager(self.rule_engine.context).close_position(symbol)
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        logger.info("\nCleaning up...")
+        await self.rule_engine.stop()
+        self.tws.disconnect()
+        logger.info("✅ Cleanup complete")
+
+
+class OrderView:
+    """
+    Live view of a symbol's orders, kept current from order events.
+    
+    The view tracks the orders created after start(), adding each one when
+    its NewOrderEvent arrives, so orders left by an earlier scenario on the
+    same OrderManager are not picked up. The Order objects are the
+    OrderManager's own, so their status is always current and waiters never
+    need to re-query the manager.
+    """
+    
+    def __init__(self, event_bus, order_manager, symbol: str):
+        """
+        Initialize the order view.
+        
+        Args:
+            event_bus: Event bus the order manager emits on
+            order_manager: OrderManager owning the orders
+            symbol: The symbol to track
+        """
+        self.event_bus = event_bus
+        self.order_manager = order_manager
+        self.symbol = symbol
+        self._orders: Dict[str, Order] = {}  # order_id -> Order
+        self._changed = asyncio.Condition()
+    
+    @property
+    def orders(self) -> List[Order]:
+        """Current orders for the symbol."""
+        return list(self._orders.values())
+    
+    async def start(self):
+        """Subscribe to order events."""
+        await self.event_bus.subscribe(OrderEvent, self._on_order_event)
+    
+    async def stop(self):
+        """Unsubscribe from order events."""
+        await self.event_bus.unsubscribe(OrderEvent, self._on_order_event)
+    
+    async def _on_order_event(self, event):
+        if event.symbol != self.symbol:
+            return
+        if isinstance(event, NewOrderEvent) and event.order_id not in self._orders:
+            order = await self.order_manager.get_order(event.order_id)
+            if order:
+                self._orders[order.order_id] = order
+        async with self._changed:
+            self._changed.notify_all()
+    
+    async def wait_for(self, predicate, timeout: float) -> bool:
+        """
+        Wait until the symbol's orders satisfy a predicate.
+        
+        The predicate is re-checked whenever an order event for the symbol is
+        emitted, so the wait ends as soon as TWS has created/updated the orders.
+        
+        Args:
+            predicate: Callable taking the list of orders for the symbol
+            timeout: Maximum time to wait in seconds
+        
+        Returns:
+            bool: True if the predicate was satisfied before the timeout
+        """
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: predicate(self.orders)),
+                    timeout=timeout
+                )
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+
+def categorize_orders(orders):
+    """
+    Group orders by (order_type, side).
+    
+    Args:
+        orders: Orders to categorize
+    
+    Returns:
+        defaultdict: (OrderType, OrderSide) -> list of orders
+    """
+    by_kind = defaultdict(list)
+    for order in orders:
+        by_kind[(order.order_type, order.side)].append(order)
+    return by_kind
+
+
+def last_order(orders, statuses=None):
+    """Return the last order, optionally restricted to the given statuses."""
+    if statuses is not None:
+        orders = [o for o in orders if o.status in statuses]
+    return orders[-1] if orders else None
+
+
+@dataclass
+class OrderSnapshot:
+    """Main, stop, target and double down orders picked from one categorization pass."""
+    __slots__ = ("main", "stop", "target", "dd")
+    main: Optional[Order]
+    stop: Optional[Order]
+    target: Optional[Order]
+    dd: Optional[Order]
+
+
+def snapshot_orders(orders, protective_statuses=None) -> OrderSnapshot:
+    """
+    Pick the main, protective and double down orders out of a symbol's orders.
+    
+    Args:
+        orders: Orders for the symbol
+        protective_statuses: Optional statuses the stop/target must have
+    
+    Returns:
+        OrderSnapshot: The categorized orders (None where not found)
+    """
+    by_kind = categorize_orders(orders)
+    return OrderSnapshot(
+        main=last_order(by_kind[(OrderType.MARKET, OrderSide.BUY)]),
+        stop=last_order(by_kind[(OrderType.STOP, OrderSide.BUY)] + by_kind[(OrderType.STOP, OrderSide.SELL)],
+                        protective_statuses),
+        target=last_order(by_kind[(OrderType.LIMIT, OrderSide.SELL)], protective_statuses),
+        dd=last_order(by_kind[(OrderType.LIMIT, OrderSide.BUY)], ACTIVE_STATUSES)
+    )
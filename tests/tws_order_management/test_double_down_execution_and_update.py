@@ -5,111 +5,92 @@ This test:
 1. Goes long GLD with 10 ATR profit target and 5 ATR stop
 2. Waits for the double down order to fill
 3. Verifies that new stop and target orders are created with doubled quantity
+
+Set TWS_TEST_SKIP_ATR=1 to skip the historical ATR fetch and estimate the
+ATR from the stop distance instead. Set TWS_TEST_SCENARIOS=N to run the
+scenario N times back to back over one TWS connection.
 """
 
 import asyncio
 import logging
 import os
+from dataclasses import dataclass
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from src.order.base import OrderSide, OrderStatus, OrderType
+from src.rule.linked_order_actions import LinkedCreateOrderAction
+
+from tests.tws_order_management._dd_common import ACTIVE_STATUSES, TestHarness, OrderView, categorize_orders, snapshot_orders
+
 logger = logging.getLogger(__name__)
 
-# Suppress some noisy loggers
-logging.getLogger('ibapi.client').setLevel(logging.WARNING)
-logging.getLogger('ibapi.wrapper').setLevel(logging.WARNING)
+
+@dataclass(frozen=True)
+class DoubleDownParams:
+    """Parameters for a double down test run."""
+    symbol: str = "GLD"
+    quantity: int = 100
+    stop_multiplier: float = 5.0     # Stop at 5 ATR
+    target_multiplier: float = 10.0  # Target at 10 ATR
+    price: float = 308.50            # Current price for the rule engine context
+
+
+# Double down statuses that end the fill wait
+_DD_DONE_STATUSES = frozenset({OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED})
+
+
+def has_main_and_protective_orders(orders):
+    """Check for a filled main order plus a stop and a target order."""
+    snap = snapshot_orders(orders)
+    return (
+        snap.main is not None and snap.main.status is OrderStatus.FILLED and
+        snap.stop is not None and
+        snap.target is not None
+    )
 
 
-async def main():
-    """Run the double down execution test."""
+async def main(harness: TestHarness, params: DoubleDownParams = DoubleDownParams()):
+    """
+    Run the double down execution test.
+    
+    Args:
+        harness: Connected harness providing the TWS connection and managers
+        params: Symbol, size and ATR multipliers for the run
+    """
+    symbol = params.symbol
+    quantity = params.quantity
+    doubled_quantity = 2 * quantity
     
     logger.info("=" * 80)
     logger.info("DOUBLE DOWN EXECUTION AND UPDATE TEST")
     logger.info("=" * 80)
     
-    # Import required modules
-    from src.tws_connection import TWSConnection
-    from src.tws_config import TWSConfig
-    from src.event.bus import EventBus
-    from src.order.manager import OrderManager
-    from src.position.tracker import PositionTracker
-    from src.rule.engine import RuleEngine
-    from src.rule.linked_order_actions import (
-        LinkedCreateOrderAction, 
-        LinkedOrderConclusionManager,
-        LinkedDoubleDownFillManager
-    )
-    from src.position.position_manager import PositionManager
-    from src.indicators.manager import IndicatorManager
+    event_bus = harness.event_bus
+    order_manager = harness.order_manager
+    rule_engine = harness.rule_engine
+    indicator_manager = harness.indicator_manager
     
-    # Create event bus
-    event_bus = EventBus()
+    # Current price for the rule engine context
+    rule_engine.context["prices"][symbol] = params.price
     
-    # Create TWS connection
-    config = TWSConfig(
-        host="127.0.0.1",
-        port=7497,
-        client_id=int(os.getenv("TWS_CLIENT_ID", "10"))
-    )
-    
-    tws = TWSConnection(config)
-    
-    # Connect to TWS
-    logger.info("Connecting to TWS...")
-    connected = await tws.connect()
-    if not connected:
-        logger.error("Failed to connect to TWS")
-        return
-    
-    logger.info("✅ Connected to TWS")
-    
-    # Create managers
-    order_manager = OrderManager(event_bus, tws)
-    await order_manager.initialize()
-    
-    position_tracker = PositionTracker(event_bus)
-    await position_tracker.initialize()
-    
-    # Create rule engine with context
-    rule_engine = RuleEngine(event_bus)
-    rule_engine.context.update({
-        "order_manager": order_manager,
-        "position_tracker": position_tracker,
-        "prices": {"GLD": 308.50}  # Current price
-    })
-    
-    # Add indicator manager for ATR calculation
-    indicator_manager = IndicatorManager(minute_data_manager=tws.minute_bar_manager)
-    rule_engine.context["indicator_manager"] = indicator_manager
-    
-    # Initialize LinkedOrderConclusionManager
-    conclusion_manager = LinkedOrderConclusionManager(rule_engine.context, event_bus)
-    await conclusion_manager.initialize()
-    
-    # Initialize LinkedDoubleDownFillManager
-    dd_fill_manager = LinkedDoubleDownFillManager(rule_engine.context, event_bus)
-    await dd_fill_manager.initialize()
-    
-    # Start rule engine
-    await rule_engine.start()
+    # Track the symbol's orders from order events instead of re-querying the manager
+    order_view = OrderView(event_bus, order_manager, symbol)
+    await order_view.start()
     
     try:
         logger.info("\n" + "=" * 60)
-        logger.info("STEP 1: Going long GLD with 10 ATR profit and 5 ATR stop")
+        logger.info(f"STEP 1: Going long {symbol} with {params.target_multiplier:g} ATR profit "
+                    f"and {params.stop_multiplier:g} ATR stop")
         logger.info("=" * 60)
         
         # Create long position with specified ATR multipliers
         create_action = LinkedCreateOrderAction(
-            symbol="GLD",
-            quantity=100,
+            symbol=symbol,
+            quantity=quantity,
             side="BUY",
             auto_create_stops=True,
-            atr_stop_multiplier=5.0,      # Stop at 5 ATR
-            atr_target_multiplier=10.0    # Target at 10 ATR
+            atr_stop_multiplier=params.stop_multiplier,
+            atr_target_multiplier=params.target_multiplier
         )
         
         success = await create_action.execute(rule_engine.context)
@@ -117,38 +98,50 @@ async def main():
             logger.error("Failed to create position")
             return
         
-        # Wait for all orders to be created
+        skip_atr = bool(os.getenv("TWS_TEST_SKIP_ATR"))
+        
+        async def fetch_atr():
+            if skip_atr:
+                return None
+            try:
+                return await indicator_manager.get_atr(
+                    symbol=symbol,
+                    period=14,
+                    days=5,
+                    bar_size="10 secs"
+                )
+            except Exception as e:
+                logger.error(f"Error calculating ATR: {e}")
+                return None
+        
+        # Wait for all orders to be created, fetching the ATR's historical
+        # bars at the same time
         logger.info("Waiting for all orders to be created...")
-        await asyncio.sleep(10)
+        orders_ready, actual_atr = await asyncio.gather(
+            order_view.wait_for(has_main_and_protective_orders, timeout=15),
+            fetch_atr()
+        )
+        if not orders_ready:
+            logger.warning("Timed out waiting for all orders to be created")
         
         logger.info("\n" + "=" * 60)
         logger.info("STEP 2: Checking created orders")
         logger.info("=" * 60)
         
         # Get all orders for the symbol
-        all_orders = await order_manager.get_orders_for_symbol("GLD")
-        logger.info(f"Found {len(all_orders)} orders for GLD")
+        all_orders = order_view.orders
+        logger.info(f"Found {len(all_orders)} orders for {symbol}")
+        
+        if logger.isEnabledFor(logging.INFO):
+            for order in all_orders:
+                logger.info("Order %s: %s %s %s @ %s - Status: %s",
+                            order.order_id, order.order_type.value, order.side.value,
+                            abs(order.quantity), order.limit_price or order.stop_price or 'MARKET',
+                            order.status.value)
         
         # Categorize orders
-        main_order = None
-        stop_order = None
-        target_order = None
-        dd_order = None
-        
-        for order in all_orders:
-            logger.info(f"Order {order.order_id}: {order.order_type.value} {order.side.value} "
-                       f"{abs(order.quantity)} @ "
-                       f"{order.limit_price or order.stop_price or 'MARKET'} - "
-                       f"Status: {order.status.value}")
-            
-            if order.order_type.value == "market" and order.side.value == "buy":
-                main_order = order
-            elif order.order_type.value == "stop":
-                stop_order = order
-            elif order.order_type.value == "limit" and order.side.value == "sell":
-                target_order = order
-            elif order.order_type.value == "limit" and order.side.value == "buy" and order.status.value in ["submitted", "accepted"]:
-                dd_order = order
+        snap = snapshot_orders(all_orders)
+        main_order, stop_order, target_order, dd_order = snap.main, snap.stop, snap.target, snap.dd
         
         # Verify we have all orders
         if not all([main_order, stop_order, target_order]):
@@ -163,22 +156,13 @@ async def main():
         logger.info(f"Stop order at: ${stop_order.stop_price:.2f}")
         logger.info(f"Target order at: ${target_order.limit_price:.2f}")
         
-        # Calculate actual ATR for GLD
-        logger.info("\nCalculating actual ATR for GLD...")
-        actual_atr = None
-        try:
-            actual_atr = await indicator_manager.get_atr(
-                symbol="GLD",
-                period=14,
-                days=5,
-                bar_size="10 secs"
-            )
-            if actual_atr:
-                logger.info(f"✅ ATR for GLD: {actual_atr:.4f}")
-            else:
-                logger.warning("Failed to calculate ATR, will estimate from order distances")
-        except Exception as e:
-            logger.error(f"Error calculating ATR: {e}")
+        # Actual ATR for the symbol, fetched while waiting for the orders
+        if skip_atr:
+            logger.info("\nTWS_TEST_SKIP_ATR set, estimating ATR from order distances")
+        elif actual_atr:
+            logger.info(f"\n✅ ATR for {symbol}: {actual_atr:.4f}")
+        else:
+            logger.warning("\nFailed to calculate ATR, will estimate from order distances")
         
         # Calculate and verify ATR distances
         stop_distance = abs(entry_price - stop_order.stop_price)
@@ -186,30 +170,33 @@ async def main():
         
         if actual_atr:
             # Use actual ATR
-            stop_atr_multiple = stop_distance / actual_atr
-            target_atr_multiple = target_distance / actual_atr
+            inv_atr = 1.0 / actual_atr
+            stop_atr_multiple = stop_distance * inv_atr
+            target_atr_multiple = target_distance * inv_atr
             
-            logger.info(f"\nATR-based distances (actual ATR={actual_atr:.4f}):")
-            logger.info(f"  Stop: ${stop_distance:.2f} = {stop_atr_multiple:.1f} ATR")
-            logger.info(f"  Target: ${target_distance:.2f} = {target_atr_multiple:.1f} ATR")
+            logger.info("\nATR-based distances (actual ATR=%.4f):\n"
+                        "  Stop: $%.2f = %.1f ATR\n"
+                        "  Target: $%.2f = %.1f ATR",
+                        actual_atr, stop_distance, stop_atr_multiple, target_distance, target_atr_multiple)
             
             # Verify ATR multiples are approximately correct
-            if abs(stop_atr_multiple - 5.0) > 1.0:
-                logger.warning(f"Stop ATR multiple {stop_atr_multiple:.1f} is not close to 5.0")
+            if abs(stop_atr_multiple - params.stop_multiplier) > 1.0:
+                logger.warning(f"Stop ATR multiple {stop_atr_multiple:.1f} is not close to {params.stop_multiplier}")
             else:
-                logger.info("✅ Stop is correctly placed at ~5 ATR")
-                
-            if abs(target_atr_multiple - 10.0) > 1.0:
-                logger.warning(f"Target ATR multiple {target_atr_multiple:.1f} is not close to 10.0")
+                logger.info(f"✅ Stop is correctly placed at ~{params.stop_multiplier:g} ATR")
+            
+            if abs(target_atr_multiple - params.target_multiplier) > 1.0:
+                logger.warning(f"Target ATR multiple {target_atr_multiple:.1f} is not close to {params.target_multiplier}")
             else:
-                logger.info("✅ Target is correctly placed at ~10 ATR")
+                logger.info(f"✅ Target is correctly placed at ~{params.target_multiplier:g} ATR")
         else:
-            # Estimate ATR from the stop distance (assuming stop is at 5 ATR)
-            estimated_atr = stop_distance / 5.0
-            logger.info(f"\nEstimated ATR from stop distance: {estimated_atr:.4f}")
-            logger.info(f"  Stop: ${stop_distance:.2f} = 5.0 ATR (by definition)")
-            logger.info(f"  Target: ${target_distance:.2f} = {target_distance/estimated_atr:.1f} ATR")
-            actual_atr = estimated_atr  # Use for later calculations
+            # Estimate ATR from the stop distance (assuming the stop is placed as configured)
+            estimated_atr = stop_distance / params.stop_multiplier
+            inv_atr = 1.0 / estimated_atr
+            logger.info("\nEstimated ATR from stop distance: %.4f\n"
+                        "  Stop: $%.2f = %.1f ATR (by definition)\n"
+                        "  Target: $%.2f = %.1f ATR",
+                        estimated_atr, stop_distance, params.stop_multiplier, target_distance, target_distance * inv_atr)
         
         # Check if double down was auto-created
         if dd_order:
@@ -240,57 +227,70 @@ async def main():
         
         # Wait for double down to fill (max 60 seconds)
         max_wait = 60
-        start_time = asyncio.get_event_loop().time()
-        while dd_order.status.value not in ["filled", "cancelled", "rejected"]:
-            await asyncio.sleep(1)
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > max_wait:
-                logger.warning(f"Double down didn't fill within {max_wait} seconds")
-                logger.info("In a real test, you would need the market to move to the double down price")
-                break
-            
-            # Log progress every 10 seconds
-            if int(elapsed) % 10 == 0 and int(elapsed) > 0:
-                logger.info(f"Still waiting... ({int(elapsed)}s elapsed)")
+        async def log_progress():
+            elapsed = 0
+            while True:
+                await asyncio.sleep(10)
+                elapsed += 10
+                logger.info(f"Still waiting... ({elapsed}s elapsed)")
+        
+        # Fill events drive the wait; cancel/reject events end it early
+        progress_task = asyncio.create_task(log_progress())
+        try:
+            dd_done = await order_view.wait_for(
+                lambda orders: dd_order.status in _DD_DONE_STATUSES,
+                timeout=max_wait
+            )
+        finally:
+            progress_task.cancel()
         
-        if dd_order.status.value != "filled":
+        if not dd_done:
+            logger.warning(f"Double down didn't fill within {max_wait} seconds")
+            logger.info("In a real test, you would need the market to move to the double down price")
+        
+        if dd_order.status is not OrderStatus.FILLED:
             logger.info(f"Double down order status: {dd_order.status.value}")
             logger.info("Test incomplete - double down did not fill")
             return
         
         logger.info(f"✅ Double down filled at ${dd_order.avg_fill_price:.2f}!")
         
-        # Wait for protective orders to be updated
+        # Wait for protective orders to be replaced
         logger.info("\nWaiting for protective orders to be updated...")
-        await asyncio.sleep(5)
+        
+        def has_new_protective_orders(orders):
+            by_kind = categorize_orders(orders)
+            stops = by_kind[(OrderType.STOP, OrderSide.BUY)] + by_kind[(OrderType.STOP, OrderSide.SELL)]
+            return (
+                any(o.order_id != original_stop_id and o.status in ACTIVE_STATUSES for o in stops) and
+                any(o.order_id != original_target_id and o.status in ACTIVE_STATUSES
+                    for o in by_kind[(OrderType.LIMIT, OrderSide.SELL)])
+            )
+        
+        protective_updated = await order_view.wait_for(has_new_protective_orders, timeout=10)
+        if not protective_updated:
+            logger.warning("Timed out waiting for protective orders to be updated")
         
         logger.info("\n" + "=" * 60)
         logger.info("STEP 4: Verifying protective orders were updated")
         logger.info("=" * 60)
         
-        # Get updated orders
-        all_orders = await order_manager.get_orders_for_symbol("GLD")
-        
-        # Find new stop and target orders
-        new_stop_order = None
-        new_target_order = None
-        
-        for order in all_orders:
-            if order.order_type.value == "stop" and order.status.value in ["submitted", "accepted"]:
-                new_stop_order = order
-            elif order.order_type.value == "limit" and order.side.value == "sell" and order.status.value in ["submitted", "accepted"]:
-                new_target_order = order
+        # Find new stop and target orders among this scenario's orders; the
+        # shared OrderManager still holds earlier scenarios' orders
+        protective = snapshot_orders(order_view.orders, protective_statuses=ACTIVE_STATUSES)
+        new_stop_order = protective.stop
+        new_target_order = protective.target
         
         # Verify old orders were cancelled
         logger.info(f"\nOriginal stop order {original_stop_id} status: {stop_order.status.value}")
         logger.info(f"Original target order {original_target_id} status: {target_order.status.value}")
         
-        if stop_order.status.value == "cancelled":
+        if stop_order.status is OrderStatus.CANCELLED:
             logger.info("✅ Original stop order was cancelled")
         else:
             logger.error("❌ Original stop order was NOT cancelled")
         
-        if target_order.status.value == "cancelled":
+        if target_order.status is OrderStatus.CANCELLED:
             logger.info("✅ Original target order was cancelled")
         else:
             logger.error("❌ Original target order was NOT cancelled")
@@ -301,11 +301,11 @@ async def main():
             logger.info(f"  Quantity: {abs(new_stop_order.quantity)} shares")
             logger.info(f"  Stop price: ${new_stop_order.stop_price:.2f}")
             
-            # Verify quantity is doubled (200 shares)
-            if abs(new_stop_order.quantity) == 200:
-                logger.info("  ✅ Stop quantity correctly updated to 200 shares")
+            # Verify quantity is doubled
+            if abs(new_stop_order.quantity) == doubled_quantity:
+                logger.info(f"  ✅ Stop quantity correctly updated to {doubled_quantity} shares")
             else:
-                logger.error(f"  ❌ Stop quantity is {abs(new_stop_order.quantity)}, expected 200")
+                logger.error(f"  ❌ Stop quantity is {abs(new_stop_order.quantity)}, expected {doubled_quantity}")
         else:
             logger.error("❌ No new stop order found")
         
@@ -314,30 +314,31 @@ async def main():
             logger.info(f"  Quantity: {abs(new_target_order.quantity)} shares")
             logger.info(f"  Limit price: ${new_target_order.limit_price:.2f}")
             
-            # Verify quantity is doubled (200 shares)
-            if abs(new_target_order.quantity) == 200:
-                logger.info("  ✅ Target quantity correctly updated to 200 shares")
+            # Verify quantity is doubled
+            if abs(new_target_order.quantity) == doubled_quantity:
+                logger.info(f"  ✅ Target quantity correctly updated to {doubled_quantity} shares")
             else:
-                logger.error(f"  ❌ Target quantity is {abs(new_target_order.quantity)}, expected 200")
+                logger.error(f"  ❌ Target quantity is {abs(new_target_order.quantity)}, expected {doubled_quantity}")
         else:
             logger.error("❌ No new target order found")
         
         # Calculate and display new average price
-        if dd_order.status.value == "filled":
-            new_avg_price = (entry_price * 100 + dd_order.avg_fill_price * 100) / 200
-            logger.info(f"\nNew average entry price: ${new_avg_price:.2f}")
-            logger.info(f"  Original entry: ${entry_price:.2f} x 100 shares")
-            logger.info(f"  Double down: ${dd_order.avg_fill_price:.2f} x 100 shares")
+        if dd_order.status is OrderStatus.FILLED:
+            new_avg_price = (entry_price + dd_order.avg_fill_price) / 2
+            logger.info("\nNew average entry price: $%.2f\n"
+                        "  Original entry: $%.2f x %s shares\n"
+                        "  Double down: $%.2f x %s shares",
+                        new_avg_price, entry_price, quantity, dd_order.avg_fill_price, quantity)
             
             # Verify stop/target distances are maintained
             if new_stop_order:
                 new_stop_distance = abs(new_avg_price - new_stop_order.stop_price)
-                new_stop_atr = new_stop_distance / actual_atr
+                new_stop_atr = new_stop_distance * inv_atr
                 logger.info(f"\nNew stop distance: ${new_stop_distance:.2f} = {new_stop_atr:.1f} ATR")
             
             if new_target_order:
                 new_target_distance = abs(new_target_order.limit_price - new_avg_price)
-                new_target_atr = new_target_distance / actual_atr
+                new_target_atr = new_target_distance * inv_atr
                 logger.info(f"New target distance: ${new_target_distance:.2f} = {new_target_atr:.1f} ATR")
         
         logger.info("\n" + "=" * 60)
@@ -345,36 +346,68 @@ async def main():
         logger.info("=" * 60)
         
         # Determine if test passed
-        test_passed = (
-            stop_order.status.value == "cancelled" and
-            target_order.status.value == "cancelled" and
-            new_stop_order is not None and
-            new_target_order is not None and
-            abs(new_stop_order.quantity) == 200 and
-            abs(new_target_order.quantity) == 200
-        )
+        qs = abs(new_stop_order.quantity) if new_stop_order else 0
+        qt = abs(new_target_order.quantity) if new_target_order else 0
+        test_passed = all((
+            stop_order.status is OrderStatus.CANCELLED,
+            target_order.status is OrderStatus.CANCELLED,
+            new_stop_order is not None,
+            new_target_order is not None,
+            qs == doubled_quantity,
+            qt == doubled_quantity
+        ))
         
         if test_passed:
             logger.info("✅ TEST PASSED: Protective orders were correctly updated with doubled quantities")
         else:
             logger.error("❌ TEST FAILED: Issues with protective order updates")
-        
+    
     finally:
         logger.info("\n" + "=" * 60)
         logger.info("TEST COMPLETE")
         logger.info("=" * 60)
         
-        # Cancel all remaining orders
-        logger.info("\nCancelling all remaining orders for cleanup...")
-        cancelled = await order_manager.cancel_all_orders("GLD", "Test cleanup")
-        logger.info(f"Cancelled {cancelled} orders")
+        # Cancel all remaining orders, if any are still live
+        live_orders = [o for o in order_view.orders if o.is_active]
+        if live_orders:
+            logger.info(f"\nCancelling {len(live_orders)} remaining orders for cleanup...")
+            cancelled = await order_manager.cancel_all_orders(symbol, "Test cleanup")
+            logger.info(f"Cancelled {cancelled} orders")
+        else:
+            logger.info("\nNo live orders to cancel")
         
-        # Cleanup
-        logger.info("\nCleaning up...")
-        await rule_engine.stop()
-        tws.disconnect()
-        logger.info("✅ Cleanup complete")
+        await order_view.stop()
+        
+        # Close the trade so the next scenario on this harness can open one
+        harness.reset_symbol(symbol)
+
+
+async def run_scenarios(*param_sets: DoubleDownParams):
+    """
+    Run double down scenarios back to back over one TWS connection.
+    
+    Args:
+        param_sets: Parameters for each run (default: a single default run)
+    """
+    try:
+        async with TestHarness() as harness:
+            for params in param_sets or (DoubleDownParams(),):
+                await main(harness, params)
+    except ConnectionError:
+        # Already logged by the harness
+        return
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    # Suppress some noisy loggers
+    logging.getLogger('ibapi.client').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.wrapper').setLevel(logging.WARNING)
+    
+    scenario_count = int(os.getenv("TWS_TEST_SCENARIOS", "1"))
+    asyncio.run(run_scenarios(*[DoubleDownParams()] * scenario_count)) 
\ No newline at end of file
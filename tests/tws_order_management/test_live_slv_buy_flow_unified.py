@@ -17,9 +17,12 @@ Usage:
 
 import asyncio
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Set
 
 # Import all necessary components
 from src.tws_config import TWSConfig
@@ -39,26 +42,10 @@ from src.position.sizer import PositionSizer
 from src.price.service import PriceService
 from src.indicators.manager import IndicatorManager
 
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('test_gld_buy_flow_unified.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
-# Reduce verbosity of specific loggers
-logging.getLogger('ibapi').setLevel(logging.WARNING)
-logging.getLogger('ibapi.client').setLevel(logging.WARNING)
-logging.getLogger('ibapi.wrapper').setLevel(logging.WARNING)
-logging.getLogger('ibapi.decoder').setLevel(logging.WARNING)
-logging.getLogger('ibapi.reader').setLevel(logging.WARNING)
-logging.getLogger('ibapi.connection').setLevel(logging.WARNING)
-logging.getLogger('ibapi.utils').setLevel(logging.WARNING)
-logging.getLogger('src.price.service').setLevel(logging.INFO)
+# Statuses counted as active in the periodic status update
+_ACTIVE_STATUSES = frozenset({OrderStatus.SUBMITTED, OrderStatus.PARTIALLY_FILLED})
 
 
 class GLDBuyFlowUnifiedTest:
@@ -74,6 +61,15 @@ class GLDBuyFlowUnifiedTest:
         self.orders_created = []
         self.fills_received = []
         self.test_complete = False
+        # Indexes over orders_created/fills_received for the fill checks
+        self._orders_by_id: Dict[str, Dict[str, Any]] = {}
+        self._filled_ids: Set[str] = set()
+        self._orders_by_type: Dict[OrderType, List[Dict[str, Any]]] = defaultdict(list)
+        # Fills buffered by on_fill_event until the next flush
+        self._fill_buffer: List[FillEvent] = []
+        self._flush_event = None
+        self._flush_task = None
+        self._position_closed = None
         
     async def initialize(self):
         """Initialize all system components."""
@@ -91,6 +87,13 @@ class GLDBuyFlowUnifiedTest:
         await self.event_bus.subscribe(FillEvent, self.on_fill_event)  # NEW: Track fills
         logger.info("Subscribed to order and fill events")
         
+        # Set once a stop or take profit fill is recorded
+        self._position_closed = asyncio.Event()
+        
+        # Record buffered fills in batches
+        self._flush_event = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_fills())
+        
         # Setup TWS connection
         config = TWSConfig.from_env()
         logger.info(f"TWS Config: host={config.host}, port={config.port}, client_id={config.client_id}")
@@ -253,49 +256,105 @@ class GLDBuyFlowUnifiedTest:
         
     async def on_new_order(self, event: NewOrderEvent):
         """Track new orders created."""
-        logger.info(f"\nNEW ORDER CREATED:")
-        logger.info(f"   Order ID: {event.order_id}")
-        logger.info(f"   Symbol: {event.symbol}")
-        logger.info(f"   Type: {event.order_type}")
-        logger.info(f"   Quantity: {event.quantity}")
-        if event.limit_price:
-            logger.info(f"   Limit Price: ${event.limit_price:.2f}")
-        if event.stop_price:
-            logger.info(f"   Stop Price: ${event.stop_price:.2f}")
-        
-        self.orders_created.append({
+        if logger.isEnabledFor(logging.INFO):
+            msg = "\nNEW ORDER CREATED:\n   Order ID: %s\n   Symbol: %s\n   Type: %s\n   Quantity: %s"
+            args = [event.order_id, event.symbol, event.order_type, event.quantity]
+            if event.limit_price:
+                msg += "\n   Limit Price: $%.2f"
+                args.append(event.limit_price)
+            if event.stop_price:
+                msg += "\n   Stop Price: $%.2f"
+                args.append(event.stop_price)
+            logger.info(msg, *args)
+        
+        order_info = {
             "order_id": event.order_id,
             "symbol": event.symbol,
             "type": event.order_type,
             "quantity": event.quantity,
             "limit_price": event.limit_price,
             "stop_price": event.stop_price
-        })
+        }
+        self.orders_created.append(order_info)
+        self._orders_by_id[event.order_id] = order_info
+        self._orders_by_type[event.order_type].append(order_info)
         
     async def on_order_status(self, event: OrderStatusEvent):
         """Track order status updates."""
-        logger.info(f"\nORDER STATUS UPDATE:")
-        logger.info(f"   Order ID: {event.order_id}")
-        logger.info(f"   Status: {event.status.value}")
-        logger.info(f"   Previous: {event.previous_status.value if event.previous_status else 'None'}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\nORDER STATUS UPDATE:\n   Order ID: %s\n   Status: %s\n   Previous: %s",
+                        event.order_id, event.status.value,
+                        event.previous_status.value if event.previous_status else 'None')
         
     async def on_fill_event(self, event: FillEvent):
         """Track fill events - NEW method."""
-        logger.info(f"\n🎯 FILL EVENT RECEIVED:")
-        logger.info(f"   Order ID: {event.order_id}")
-        logger.info(f"   Symbol: {event.symbol}")
-        logger.info(f"   Fill Price: ${event.fill_price:.2f}")
-        logger.info(f"   Fill Quantity: {event.fill_quantity}")
-        logger.info(f"   Status: {event.status.value}")
-        logger.info(f"   ⚡ UnifiedFillManager will handle protective order updates")
-        
-        self.fills_received.append({
+        # Buffer the fill; a burst of fills is recorded and logged in one flush
+        self._fill_buffer.append(event)
+        self._flush_event.set()
+    
+    async def _flush_fills(self, window: float = 0.02):
+        """
+        Record buffered fills in batches.
+        
+        Args:
+            window: Seconds to let a burst of fills accumulate before recording it
+        """
+        while True:
+            await self._flush_event.wait()
+            await asyncio.sleep(window)
+            self._flush_event.clear()
+            try:
+                self._record_fills()
+            except Exception:
+                # Keep flushing; a bad fill must not stop later fills being recorded
+                logger.exception("Error recording buffered fills")
+    
+    def _record_fills(self):
+        """Record and log the buffered fills."""
+        fills, self._fill_buffer = self._fill_buffer, []
+        if not fills:
+            return
+        
+        self.fills_received.extend({
             "order_id": event.order_id,
             "symbol": event.symbol,
             "fill_price": event.fill_price,
             "fill_quantity": event.fill_quantity,
             "status": event.status
-        })
+        } for event in fills)
+        self._filled_ids.update(event.order_id for event in fills)
+        
+        # A stop or take profit (limit sell) fill closes the position
+        orders_by_id = self._orders_by_id
+        for event in fills:
+            order_info = orders_by_id.get(event.order_id)
+            if order_info and (order_info['type'] is OrderType.STOP or
+                               (order_info['type'] is OrderType.LIMIT and order_info['quantity'] < 0)):
+                self._position_closed.set()
+                break
+        
+        # Log after recording, so a fill that can't be formatted is still tracked
+        if logger.isEnabledFor(logging.INFO):
+            lines = [f"\n🎯 {len(fills)} FILL EVENT(S) RECEIVED:"]
+            for event in fills:
+                lines.append(f"   Order ID: {event.order_id} | Symbol: {event.symbol} | "
+                             f"Fill: {event.fill_quantity} @ ${event.fill_price:.2f} | Status: {event.status.value}")
+            lines.append("   ⚡ UnifiedFillManager will handle protective order updates")
+            logger.info("\n".join(lines))
+    
+    def _any_filled(self, predicate) -> bool:
+        """
+        Check whether any filled order matches a predicate.
+        
+        Args:
+            predicate: Callable taking an order info dict
+            
+        Returns:
+            bool: True if a filled order satisfies the predicate
+        """
+        orders_by_id = self._orders_by_id
+        return any(predicate(orders_by_id[order_id])
+                   for order_id in self._filled_ids if order_id in orders_by_id)
         
     async def simulate_partial_fill(self):
         """Simulate a partial fill to test UnifiedFillManager behavior."""
@@ -304,7 +363,7 @@ class GLDBuyFlowUnifiedTest:
         logger.info("=" * 80)
         
         # Find the main order
-        main_orders = [o for o in self.orders_created if o['type'] == OrderType.MARKET and o['quantity'] > 0]
+        main_orders = [o for o in self._orders_by_type[OrderType.MARKET] if o['quantity'] > 0]
         if not main_orders:
             logger.warning("No main order found to simulate fill")
             return
@@ -339,10 +398,11 @@ class GLDBuyFlowUnifiedTest:
         logger.info("=" * 80)
         
         # Find the double down order
-        dd_orders = [o for o in self.orders_created if o['type'] == OrderType.LIMIT and o['quantity'] > 0 and 'doubledown' in str(o['order_id'])]
+        limit_buy_orders = [o for o in self._orders_by_type[OrderType.LIMIT] if o['quantity'] > 0]
+        dd_orders = [o for o in limit_buy_orders if 'doubledown' in str(o['order_id'])]
         if not dd_orders:
             # Find by checking all limit buy orders (excluding main order)
-            dd_orders = [o for o in self.orders_created if o['type'] == OrderType.LIMIT and o['quantity'] > 0]
+            dd_orders = limit_buy_orders
             
         if not dd_orders:
             logger.warning("No double down order found to simulate fill")
@@ -379,7 +439,7 @@ class GLDBuyFlowUnifiedTest:
         logger.info("=" * 80)
         
         # Find the stop order
-        stop_orders = [o for o in self.orders_created if o['type'] == OrderType.STOP]
+        stop_orders = self._orders_by_type[OrderType.STOP]
         if not stop_orders:
             logger.warning("No stop order found to simulate fill")
             return
@@ -430,13 +490,10 @@ class GLDBuyFlowUnifiedTest:
         logger.info(f"\nORDERS SUMMARY:")
         logger.info(f"   Total orders created: {len(self.orders_created)}")
         
-        market_orders = [o for o in self.orders_created if o['type'] == OrderType.MARKET]
-        stop_orders = [o for o in self.orders_created if o['type'] == OrderType.STOP]
-        limit_orders = [o for o in self.orders_created if o['type'] == OrderType.LIMIT]
-        
-        logger.info(f"   Market orders: {len(market_orders)}")
-        logger.info(f"   Stop orders: {len(stop_orders)}")
-        logger.info(f"   Limit orders: {len(limit_orders)}")
+        orders_by_type = self._orders_by_type
+        logger.info(f"   Market orders: {len(orders_by_type[OrderType.MARKET])}")
+        logger.info(f"   Stop orders: {len(orders_by_type[OrderType.STOP])}")
+        logger.info(f"   Limit orders: {len(orders_by_type[OrderType.LIMIT])}")
         
         # Expected: 1 market (main), 1 stop, 1 limit (target), 1 limit (double down)
         expected_total = 4
@@ -475,68 +532,70 @@ class GLDBuyFlowUnifiedTest:
         logger.info("  - Stop loss to fill (closes position)")
         logger.info("  - Take profit to fill (closes position)")
         
-        start_time = asyncio.get_event_loop().time()
+        loop = asyncio.get_running_loop()
         timeout = 300  # 5 minutes timeout
-        last_fill_count = len(self.fills_received)
-        position_closed = False
+        status_task = asyncio.create_task(self._log_status_periodically(loop.time()))
+        try:
+            # Set when a stop or take profit fill is recorded
+            await asyncio.wait_for(self._position_closed.wait(), timeout)
+            logger.info("\n✅ Position closed via protective order")
+            # Give time for order cancellations to process
+            await asyncio.sleep(3)
+        except asyncio.TimeoutError:
+            logger.info(f"\n⏱️ Monitoring timeout reached ({timeout} seconds)")
+        finally:
+            status_task.cancel()
+            try:
+                await status_task
+            except asyncio.CancelledError:
+                pass
         
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            await asyncio.sleep(2)
-            
-            # Check for new fills
-            current_fill_count = len(self.fills_received)
-            if current_fill_count > last_fill_count:
-                logger.info(f"\n🎯 New fill detected! Total fills: {current_fill_count}")
-                last_fill_count = current_fill_count
-                
-                # Check if stop or profit filled (position closing orders)
-                stop_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'stop' 
-                                for o in self.orders_created for f in self.fills_received)
-                profit_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'limit' and o['quantity'] < 0 
-                                  for o in self.orders_created for f in self.fills_received)
-                
-                if stop_filled or profit_filled:
-                    logger.info("\n✅ Position closed via protective order")
-                    position_closed = True
-                    # Give time for order cancellations to process
-                    await asyncio.sleep(3)
-                    break
-            
-            # Check position status using position_tracker
-            position_tracker = self.position_tracker
-            if position_tracker:
-                positions_list = await position_tracker.get_positions_for_symbol("GLD")
-                gld_positions = [p for p in positions_list if p.quantity != 0]
-                
-                if gld_positions:
-                    pos = gld_positions[0]
-                    logger.info(f"\r⏳ Position open: {pos.quantity} shares @ ${pos.entry_price:.2f} | P&L: ${pos.unrealized_pnl:.2f}", end="")
-                elif position_closed:
-                    logger.info("\n✅ Position confirmed closed")
-                    break
+        # Log final state
+        await self.log_final_state()
+    
+
+    
+    async def _log_status_periodically(self, start_time: float, interval: float = 30):
+        """
+        Log the position and order status while verify_orders waits for the position to close.
+        
+        Args:
+            start_time: Event loop time the monitoring started at
+            interval: Seconds between status updates
+        """
+        loop = asyncio.get_running_loop()
+        order_manager = self.order_manager
+        position_tracker = self.position_tracker
+        
+        while True:
+            await asyncio.sleep(interval)
             
-            # Log order status periodically
-            elapsed = int(asyncio.get_event_loop().time() - start_time)
-            if elapsed % 30 == 0 and elapsed > 0:  # Every 30 seconds
+            try:
+                elapsed = int(loop.time() - start_time)
                 logger.info(f"\n\n📊 Status update at {elapsed}s:")
                 logger.info(f"   Fills received: {len(self.fills_received)}")
                 
+                # Check position status using position_tracker
+                if position_tracker:
+                    positions_list = await position_tracker.get_positions_for_symbol("GLD")
+                    gld_positions = [p for p in positions_list if p.quantity != 0]
+                    
+                    if gld_positions:
+                        pos = gld_positions[0]
+                        logger.info(f"   ⏳ Position open: {pos.quantity} shares @ ${pos.entry_price:.2f} | P&L: ${pos.unrealized_pnl:.2f}")
+                
                 # Check current order statuses
-                active_orders = 0
-                for order_info in self.orders_created:
-                    order = await self.order_manager.get_order(order_info['order_id'])
-                    if order and order.status.value in ['submitted', 'presubmitted', 'partially_filled']:
-                        active_orders += 1
+                orders = await asyncio.gather(
+                    *[order_manager.get_order(order_info['order_id'])
+                      for order_info in self.orders_created]
+                )
+                active_orders = sum(1 for order in orders if order and order.status in _ACTIVE_STATUSES)
                 
                 logger.info(f"   Active orders: {active_orders}")
-        
-        if (asyncio.get_event_loop().time() - start_time) >= timeout:
-            logger.info(f"\n⏱️ Monitoring timeout reached ({timeout} seconds)")
-        
-        # Log final state
-        await self.log_final_state()
-    
-
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error logging periodic status update")
     
     async def log_final_state(self):
         """Log the final state of all orders."""
@@ -544,12 +603,16 @@ class GLDBuyFlowUnifiedTest:
         logger.info("FINAL ORDER STATE & VERIFICATION")
         logger.info("=" * 80)
         
-        # Get current order states from order manager
+        # Get current order states from order manager in one batch
+        orders = []
         if self.order_manager:
             logger.info("\nChecking current order states...")
-            for order_info in self.orders_created:
+            orders = await asyncio.gather(
+                *[self.order_manager.get_order(order_info['order_id'])
+                  for order_info in self.orders_created]
+            )
+            for order_info, order in zip(self.orders_created, orders):
                 order_id = order_info['order_id']
-                order = await self.order_manager.get_order(order_id)
                 if order:
                     logger.info(f"\nOrder {order_id}:")
                     logger.info(f"  Type: {order.order_type.value}")
@@ -564,17 +627,10 @@ class GLDBuyFlowUnifiedTest:
         logger.info("=" * 80)
         
         # Check what happened
-        main_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'market' 
-                         for o in self.orders_created for f in self.fills_received)
-        
-        dd_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'limit' and o['quantity'] > 0 
-                       for o in self.orders_created for f in self.fills_received)
-        
-        stop_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'stop' 
-                         for o in self.orders_created for f in self.fills_received)
-        
-        profit_filled = any(f['order_id'] == o['order_id'] and o['type'].value == 'limit' and o['quantity'] < 0 
-                           for o in self.orders_created for f in self.fills_received)
+        main_filled = self._any_filled(lambda o: o['type'] is OrderType.MARKET)
+        dd_filled = self._any_filled(lambda o: o['type'] is OrderType.LIMIT and o['quantity'] > 0)
+        stop_filled = self._any_filled(lambda o: o['type'] is OrderType.STOP)
+        profit_filled = self._any_filled(lambda o: o['type'] is OrderType.LIMIT and o['quantity'] < 0)
         
         logger.info(f"✓ Main order filled: {main_filled}")
         logger.info(f"{'✓' if dd_filled else '○'} Double down filled: {dd_filled}")
@@ -590,11 +646,7 @@ class GLDBuyFlowUnifiedTest:
             logger.info("\n✅ Take profit filled - all other orders should have been cancelled")
         
         # Count cancelled orders
-        cancelled_count = 0
-        for order_info in self.orders_created:
-            order = await self.order_manager.get_order(order_info['order_id'])
-            if order and order.status.value == 'cancelled':
-                cancelled_count += 1
+        cancelled_count = sum(1 for order in orders if order and order.status is OrderStatus.CANCELLED)
         
         logger.info(f"\nTotal orders cancelled: {cancelled_count}")
         
@@ -615,18 +667,29 @@ class GLDBuyFlowUnifiedTest:
         logger.info("CLEANING UP TEST")
         logger.info("=" * 80)
         
+        # Stop the fill flusher and record anything still buffered
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._record_fills()
+        
         # Cancel all created orders
         if self.orders_created and self.order_manager:
             logger.info(f"Cancelling {len(self.orders_created)} test orders...")
-            for order in self.orders_created:
-                try:
-                    await self.order_manager.cancel_order(
-                        order['order_id'], 
-                        "Test cleanup"
-                    )
+            # Send all cancellations to TWS concurrently
+            results = await asyncio.gather(
+                *[self.order_manager.cancel_order(order['order_id'], "Test cleanup")
+                  for order in self.orders_created],
+                return_exceptions=True
+            )
+            for order, result in zip(self.orders_created, results):
+                if isinstance(result, Exception):
+                    logger.error(f"   Error cancelling order {order['order_id']}: {result}")
+                else:
                     logger.info(f"   Cancelled order {order['order_id']}")
-                except Exception as e:
-                    logger.error(f"   Error cancelling order {order['order_id']}: {e}")
         
         # Cleanup UnifiedFillManager
         if self.unified_fill_manager:
@@ -704,5 +767,34 @@ if __name__ == "__main__":
     print("=" * 80)
     print("\n🚀 Starting test automatically...")
     
-    asyncio.run(main())
+    # Configure detailed logging; records are formatted by the queue handler and
+    # written to the file and stdout by a background listener so log calls don't
+    # block the event loop on I/O
+    log_queue = queue.Queue(-1)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[QueueHandler(log_queue)]
+    )
+    log_listener = QueueListener(
+        log_queue,
+        logging.FileHandler('test_gld_buy_flow_unified.log', encoding='utf-8'),
+        logging.StreamHandler(sys.stdout)
+    )
+    
+    # Reduce verbosity of specific loggers
+    logging.getLogger('ibapi').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.client').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.wrapper').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.decoder').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.reader').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.connection').setLevel(logging.WARNING)
+    logging.getLogger('ibapi.utils').setLevel(logging.WARNING)
+    logging.getLogger('src.price.service').setLevel(logging.INFO)
+    
+    log_listener.start()
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
  
\ No newline at end of file